@@ -0,0 +1,550 @@
+"""
+This module interacts with the Google AI API to enrich video game data.
+It processes game titles to generate genres, descriptions, and player modes,
+then saves the enhanced data to a CSV file.
+
+Everything is driven through the enrich() function so the pipeline can be
+imported from tests or benchmarks as well as run via main.py.
+
+Installation:
+    pip install -r requirements.txt
+"""
+
+import os
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import re
+import time
+import urllib.request
+import diskcache
+import pandas as pd
+import pyarrow as pa
+import google.generativeai as genai
+from pyarrow import csv as pacsv
+from aiolimiter import AsyncLimiter
+from dotenv import load_dotenv
+from google.api_core import exceptions as google_exceptions
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# All the static instruction text lives in the system instruction, which is
+# sent once per request as an identical prefix -- the provider's prefix cache
+# can serve it across requests -- so the per-game user prompt only has to
+# carry the title.
+SYSTEM_INSTRUCTION = (
+    "You are enriching a video-game database. For each game title you are given, "
+    'answer with a JSON object containing exactly these keys: "genre", '
+    '"description", "player_mode".\n'
+    "- genre: the primary single-word genre. "
+    "Examples: Fighting, Shooter, RPG, Simulation, Strategy, Action, Adventure, Puzzle, Sports, Racing.\n"
+    "- description: the text for a 'description' field in a game database. "
+    "Keep it concise (strictly under 30 words), do NOT use the game title, and focus on the gameplay.\n"
+    "- player_mode: whether the game supports single-player only, multiplayer only, or both. "
+    "Use *only one* of these exact words: 'Singleplayer', 'Multiplayer', or 'Both'."
+)
+
+# Game-title classification is a low-risk prompt domain, and spurious safety
+# blocks are the main source of "Error" rows (each one wastes a full request
+# and a retry). Turning the classifiers off for all categories removes that
+# failure mode and the server-side classification work.
+SAFETY_SETTINGS = {
+    genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
+    genai.types.HarmCategory.HARM_CATEGORY_HATE_SPEECH: genai.types.HarmBlockThreshold.BLOCK_NONE,
+    genai.types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: genai.types.HarmBlockThreshold.BLOCK_NONE,
+    genai.types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
+}
+
+# Requests per minute allowed by the API tier. The token bucket releases
+# requests at exactly this rate, so throughput is tier-limited rather than
+# hard-coded to a worst-case delay; set this to match your Gemini quota.
+# The AsyncLimiter itself is created per run inside enrich_all, because it
+# binds to the running event loop and asyncio.run gives each enrich() call a
+# fresh one.
+REQUESTS_PER_MINUTE = 30
+
+# Schema enforced server-side on the JSON output. The player_mode enum means
+# the model cannot emit anything outside the three allowed values, so bad
+# outputs are rejected during generation instead of being caught (and paid
+# for) after the fact.
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "genre": {"type": "STRING"},
+        "description": {"type": "STRING"},
+        "player_mode": {
+            "type": "STRING",
+            "enum": ["Singleplayer", "Multiplayer", "Both"],
+        },
+    },
+    "required": ["genre", "description", "player_mode"],
+}
+
+# Generation latency is linear in output tokens, so cap the budget at what
+# the merged JSON payload needs: a one-word genre, the description, a
+# one-word player mode and the JSON punctuation. The cap carries real
+# headroom for the model rambling past the 30-word description limit (which
+# parse_fields already anticipates by truncating at 35 words) -- a too-tight
+# cap would cut the JSON off mid-object and waste the whole request.
+MAX_OUTPUT_TOKENS = 256
+
+# Ask for all three fields in one request so each game costs a single
+# round-trip instead of three. JSON mode keeps the output machine-parseable,
+# and temperature 0 keeps the classification deterministic.
+GENERATION_CONFIG = genai.types.GenerationConfig(
+    response_mime_type="application/json",
+    response_schema=RESPONSE_SCHEMA,
+    temperature=0,
+    max_output_tokens=MAX_OUTPUT_TOKENS,
+)
+
+# Built once at module scope; with the instructions in SYSTEM_INSTRUCTION the
+# per-game user prompt is just the title, so each request pays input tokens
+# only for what actually varies.
+PROMPT_TMPL = "Game title: '{}'"
+
+# Persistent response cache. The prompts run at temperature 0, so the same
+# (model, prompt) pair always maps to the same answer and can be served from
+# disk on reruns -- a rerun after partial failures only pays for the games
+# that actually errored.
+CACHE_DIR = "./gemini_cache"
+cache = diskcache.Cache(CACHE_DIR)
+
+
+def cache_key(model, prompt):
+    """Return the cache key for a prompt under the given model.
+
+    The system instruction is part of the key so cached answers are
+    invalidated whenever the shared instructions change.
+    """
+    return hashlib.sha256(
+        (model.model_name + SYSTEM_INSTRUCTION + prompt).encode("utf-8")
+    ).hexdigest()
+
+
+@retry(
+    retry=retry_if_exception_type(google_exceptions.ResourceExhausted),
+    wait=wait_exponential_jitter(initial=1, max=60),
+    stop=stop_after_attempt(6),
+    reraise=True,
+)
+async def generate_limited(model, prompt, rate_limiter):
+    """Issue one generate call through the rate limiter, backing off on 429s."""
+    async with rate_limiter:
+        return await model.generate_content_async(
+            prompt,
+            generation_config=GENERATION_CONFIG,
+        )
+
+
+async def generate_cached(model, prompt, rate_limiter):
+    """Return the response text for a prompt, via the disk cache if possible."""
+    key = cache_key(model, prompt)
+    cached_text = cache.get(key)
+    if cached_text is not None:
+        return cached_text
+    try:
+        response = await generate_limited(model, prompt, rate_limiter)
+        # A response cut off by the output cap is unparseable JSON; fail it
+        # explicitly (and uncached) so the next run retries it instead of
+        # feeding truncated text to the parser.
+        if response.candidates and response.candidates[0].finish_reason.name == "MAX_TOKENS":
+            raise ValueError(
+                f"response truncated at MAX_OUTPUT_TOKENS ({MAX_OUTPUT_TOKENS})"
+            )
+        text = response.text
+    except Exception:
+        # Check if the error is due to blocked content (safety settings)
+        try:
+            logger.error("  Safety feedback: %s", response.prompt_feedback)
+        except (
+            Exception
+        ):  # Handle case where response object might not exist or have feedback
+            pass
+        raise
+    # Only cache text that actually parses as JSON. Caching before validation
+    # would freeze a malformed (e.g. truncated) response on disk, and every
+    # rerun would serve the same bad text without ever retrying the API call.
+    json.loads(text)
+    cache.set(key, text)
+    return text
+
+
+# The model sometimes prefixes its description with a literal "Description:"
+# label; strip it with one precompiled case-insensitive pattern instead of
+# lowercasing the whole string just to run a startswith check
+DESC_PREFIX = re.compile(r"^\s*description:\s*", re.IGNORECASE)
+
+
+def parse_fields(response_text):
+    """Parse and clean a JSON response into (genre, description, player_mode)."""
+    fields = json.loads(response_text)
+
+    GENRE = str(fields["genre"]).strip()
+    logger.info("  Genre: %s", GENRE)
+
+    DESCRIPTION = DESC_PREFIX.sub("", str(fields["description"]).strip(), count=1)
+
+    # Optional: Add a check/truncation if the model ignores the length limit
+    words = DESCRIPTION.split()
+    if len(words) > 35:  # Allow a little leeway
+        DESCRIPTION = " ".join(words[:30]) + "..."
+        logger.info("  Description (truncated): %s", DESCRIPTION)
+    else:
+        logger.info("  Description: %s", DESCRIPTION)
+
+    # No validation needed here: the response schema constrains player_mode
+    # to the three allowed values server-side
+    PLAYER_MODE = str(fields["player_mode"]).strip()
+    logger.info("  Player Mode: %s", PLAYER_MODE)
+
+    return GENRE, DESCRIPTION, PLAYER_MODE
+
+
+async def safe_enrich(model, game_title, rate_limiter):
+    """Generate and parse the fields for one game, never raising.
+
+    Any failure -- API error, blocked content, malformed JSON -- is logged
+    and mapped to the "Error" placeholder tuple, so callers need no
+    try/except of their own.
+    """
+    try:
+        return parse_fields(
+            await generate_cached(model, PROMPT_TMPL.format(game_title), rate_limiter)
+        )
+    except Exception as e:
+        logger.error("  Error enriching %s: %s", game_title, e)
+        return ("Error", "Error", "Error")  # Placeholder for errors
+
+
+# Each finished game is appended to this file immediately, so a crash after
+# hour N of API calls loses at most the rows still in flight. On restart the
+# rows already present are reused instead of being recomputed.
+PROGRESS_FILE = "enrichment_progress.csv"
+PROGRESS_FIELDS = ["game_title", "genre", "short_description", "player_mode"]
+
+
+def load_progress():
+    """Return previously completed rows as {game_title: (genre, description, player_mode)}."""
+    completed = {}
+    if os.path.exists(PROGRESS_FILE):
+        with open(PROGRESS_FILE, newline="", encoding="utf-8") as progress_file:
+            for row in csv.DictReader(progress_file):
+                completed[row["game_title"]] = (
+                    row["genre"],
+                    row["short_description"],
+                    row["player_mode"],
+                )
+    return completed
+
+
+async def enrich_game(
+    model,
+    index,
+    game_title,
+    total_games,
+    semaphore,
+    rate_limiter,
+    completed,
+    writer,
+    progress_file,
+):
+    """Generate the genre, short description and player mode for one game.
+
+    Returns a (genre, description, player_mode) tuple, using "Error" as a
+    placeholder for any field that could not be generated.
+    """
+    previous = completed.get(game_title)
+    if previous is not None:
+        logger.info(
+            "\nSkipping (%d/%d): %s (already in %s)",
+            index + 1,
+            total_games,
+            game_title,
+            PROGRESS_FILE,
+        )
+        return previous
+
+    async with semaphore:
+        logger.info("\nProcessing (%d/%d): %s", index + 1, total_games, game_title)
+
+        GENRE, DESCRIPTION, PLAYER_MODE = await safe_enrich(
+            model, game_title, rate_limiter
+        )
+
+        # Record successful rows immediately so they survive a crash; failed
+        # rows are left out so the next run retries them. Coroutines only
+        # yield at await points, so the synchronous writerow cannot interleave
+        # with another game's row.
+        if GENRE != "Error":
+            writer.writerow(
+                {
+                    "game_title": game_title,
+                    "genre": GENRE,
+                    "short_description": DESCRIPTION,
+                    "player_mode": PLAYER_MODE,
+                }
+            )
+            progress_file.flush()
+
+        return GENRE, DESCRIPTION, PLAYER_MODE
+
+
+async def enrich_all(model, df, concurrency):
+    """Enrich each distinct game title concurrently.
+
+    Returns {game_title: (genre, description, player_mode)}. Duplicate rows
+    in the input share one API call and get the same answer on assignment.
+    """
+    # Pull the titles out as plain strings once instead of materializing a
+    # Series per row with df.iterrows()
+    titles = df["game_title"].drop_duplicates().tolist()
+    total_games = len(titles)
+    semaphore = asyncio.Semaphore(concurrency)
+    # Both primitives bind to the event loop they are first used on, so they
+    # must be created fresh for each run's loop
+    rate_limiter = AsyncLimiter(REQUESTS_PER_MINUTE, 60)
+    completed = load_progress()
+    if completed:
+        logger.info("Resuming: %d game(s) already in %s.", len(completed), PROGRESS_FILE)
+    with open(PROGRESS_FILE, "a", newline="", encoding="utf-8") as progress_file:
+        writer = csv.DictWriter(progress_file, fieldnames=PROGRESS_FIELDS)
+        if progress_file.tell() == 0:
+            writer.writeheader()
+        tasks = [
+            enrich_game(
+                model, index, game_title, total_games, semaphore, rate_limiter,
+                completed, writer, progress_file,
+            )
+            for index, game_title in enumerate(titles)
+        ]
+        results = await asyncio.gather(*tasks)
+    return dict(zip(titles, results))
+
+
+# --- Optional: offline bulk enrichment via the Batch API ---
+# Batch jobs are billed at roughly half the interactive price and are not
+# subject to per-request rate limits; in exchange the results arrive
+# asynchronously (the job can take minutes to hours). Worth it for large
+# one-shot runs over a static CSV. Enable with USE_BATCH_API=1. The installed
+# SDK has no batch surface, so this talks to the REST endpoint directly.
+USE_BATCH_API = os.getenv("USE_BATCH_API", "").lower() in ("1", "true", "yes")
+BATCH_POLL_SECONDS = 30
+API_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+# SAFETY_SETTINGS in the wire format the REST endpoint expects, so batch
+# requests disable the same classifiers as the interactive path
+SAFETY_SETTINGS_REST = [
+    {"category": category.name, "threshold": threshold.name}
+    for category, threshold in SAFETY_SETTINGS.items()
+]
+
+
+def api_call(url, api_key, payload=None):
+    """POST a JSON payload to the Gemini REST API (GET when payload is None)."""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8") if payload is not None else None,
+        headers={"Content-Type": "application/json", "x-goog-api-key": api_key},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def enrich_all_batch(model, api_key, df):
+    """Enrich each distinct game title through one Batch API submission.
+
+    Returns {game_title: (genre, description, player_mode)}, like enrich_all.
+    """
+    titles = df["game_title"].drop_duplicates().tolist()
+    logger.info("Submitting batch job for %d game(s)...", len(titles))
+    batch_requests = [
+        {
+            "request": {
+                "systemInstruction": {"parts": [{"text": SYSTEM_INSTRUCTION}]},
+                "safetySettings": SAFETY_SETTINGS_REST,
+                "contents": [{"parts": [{"text": PROMPT_TMPL.format(game_title)}]}],
+                "generationConfig": {
+                    "responseMimeType": "application/json",
+                    "responseSchema": RESPONSE_SCHEMA,
+                    "temperature": 0,
+                    "maxOutputTokens": MAX_OUTPUT_TOKENS,
+                },
+            },
+            # The key lets us join responses back onto the titles, since the
+            # batch results are not guaranteed to preserve submission order
+            "metadata": {"key": game_title},
+        }
+        for game_title in titles
+    ]
+    operation = api_call(
+        f"{API_BASE_URL}/{model.model_name}:batchGenerateContent",
+        api_key,
+        {
+            "batch": {
+                "displayName": "game-data-enrichment",
+                "inputConfig": {"requests": {"requests": batch_requests}},
+            }
+        },
+    )
+
+    # Poll the long-running operation; batch turnaround is minutes-to-hours,
+    # so a slow poll is plenty
+    while not operation.get("done"):
+        state = operation.get("metadata", {}).get("state", "PENDING")
+        logger.info(
+            "  Batch job state: %s; polling again in %ds...",
+            state,
+            BATCH_POLL_SECONDS,
+        )
+        time.sleep(BATCH_POLL_SECONDS)
+        operation = api_call(f"{API_BASE_URL}/{operation['name']}", api_key)
+
+    # Join the responses back onto the titles by the metadata key
+    enriched = {}
+    inlined = (
+        operation.get("response", {})
+        .get("inlinedResponses", {})
+        .get("inlinedResponses", [])
+    )
+    for entry in inlined:
+        game_title = entry.get("metadata", {}).get("key")
+        logger.info("\nBatch result for: %s", game_title)
+        try:
+            text = entry["response"]["candidates"][0]["content"]["parts"][0]["text"]
+            enriched[game_title] = parse_fields(text)
+        except Exception as e:
+            logger.error("  Error enriching %s: %s", game_title, e)
+
+    return {
+        game_title: enriched.get(game_title, ("Error", "Error", "Error"))
+        for game_title in titles
+    }
+
+
+def enrich(
+    input_csv: str,
+    output_csv: str,
+    model_name: str = "gemini-2.0-flash-lite",
+    concurrency: int = 8,
+) -> None:
+    """Run the full enrichment pipeline from input file to output file.
+
+    Loads the games from input_csv (or a .parquet file), generates genre,
+    short_description and player_mode for each distinct title, and writes the
+    enriched frame to output_csv (or .parquet). Setup and load failures are
+    logged and re-raised.
+    """
+    # --- Step 1: Setup ---
+    logger.info("--- Step 1: Setting up ---")
+
+    # Load environment variables from .env file
+    load_dotenv()
+
+    # Configure the genai library with the API key
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError(
+            "GOOGLE_API_KEY not found in environment variables or .env file"
+        )
+
+    try:
+        # Use the gRPC transport so every request reuses one persistent HTTP/2
+        # channel to generativelanguage.googleapis.com instead of paying the
+        # TCP+TLS handshake per call -- all our concurrent requests hit that
+        # single host. Calling configure() on every invocation also resets the
+        # SDK's client cache, so a repeated in-process enrich() call builds
+        # its async client inside the new run's event loop instead of reusing
+        # one bound to the previous (closed) loop.
+        genai.configure(api_key=api_key, transport="grpc_asyncio")
+        logger.info("Successfully configured Google AI service.")
+
+        model = genai.GenerativeModel(
+            model_name,
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTION,
+        )
+        logger.info("Using model: %s", model.model_name)
+    except Exception as e:
+        logger.error("Error configuring Google AI or initializing model: %s", e)
+        raise
+
+    # --- Step 2: Load the CSV Data ---
+    logger.info("\n--- Step 2: Loading CSV Data ---")
+    try:
+        if input_csv.endswith(".parquet"):
+            # Parquet is columnar, typed and compressed -- much faster to
+            # parse than CSV text for large inputs
+            df = pd.read_parquet(input_csv)
+        else:
+            # The pyarrow engine parses CSV in parallel native code
+            df = pd.read_csv(input_csv, engine="pyarrow")
+        logger.info("Successfully loaded %s.", input_csv)
+        logger.info("DataFrame Head:\n%s", df.head())
+    except FileNotFoundError:
+        logger.error(
+            "Error: %s not found. Please ensure it's in the correct directory.",
+            input_csv,
+        )
+        raise
+    except Exception as e:
+        logger.error("Error loading CSV: %s", e)
+        raise
+
+    # --- Step 3: Interact with Google AI API ---
+    logger.info("\n--- Step 3: Enriching Data using Google AI API ---")
+
+    if USE_BATCH_API:
+        enriched = enrich_all_batch(model, api_key, df)
+    else:
+        enriched = asyncio.run(enrich_all(model, df, concurrency))
+
+    logger.info("\n--- Finished processing all games ---")
+
+    # --- Step 4: Add New Data to DataFrame ---
+    logger.info("\n--- Step 4: Adding New Data to DataFrame ---")
+
+    # Assign the new columns straight from the per-title dict in row order.
+    # Every title is guaranteed a tuple (failures carry the "Error"
+    # placeholder), so the columns always line up with the frame and no
+    # list-length reconciliation check is needed.
+    all_titles = df["game_title"].tolist()
+    for position, column in enumerate(("genre", "short_description", "player_mode")):
+        df[column] = pd.array(
+            [enriched[game_title][position] for game_title in all_titles],
+            dtype="string",
+        )
+
+    logger.info(
+        "Successfully added new columns: 'genre', 'short_description', 'player_mode'."
+    )
+    logger.info("Updated DataFrame Head:\n%s", df.head())
+
+    # --- Step 5: Save the Enhanced Data ---
+    logger.info("\n--- Step 5: Saving Enhanced Data ---")
+
+    try:
+        if output_csv.endswith(".parquet"):
+            # Columnar, compressed output -- smaller files and faster reads
+            # for any downstream consumer
+            df.to_parquet(output_csv, index=False, compression="zstd")
+        else:
+            # Serialize through pyarrow rather than df.to_csv: the cells are
+            # encoded in native code with parallel column handling instead of
+            # cell-by-cell in Python. Output is the same UTF-8 CSV, without
+            # the index column.
+            pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), output_csv)
+        logger.info("Enhanced data successfully saved to '%s'", output_csv)
+    except Exception as e:
+        logger.error("Error saving DataFrame: %s", e)
+
+    logger.info("\n--- Script finished ---")